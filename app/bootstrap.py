@@ -1,87 +1,197 @@
-from datetime import datetime, timedelta, time as dtime
+import copy
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .db import engine, db_session
 from .models import Base, Product, DeliverySlot, Setting
 from .config import settings as cfg
 
 
+# Above this many new slots (~125 days of hourly slots), seed_slots switches
+# to COPY on Postgres
+_COPY_MIN_ROWS = 1000
+
+# Default value of the "global" settings row, built once at import. The
+# proxy only guards the top level; seed_settings deep-copies it so the
+# nested availability list is never shared with a stored row.
+_DEFAULT_GLOBAL_SETTINGS = MappingProxyType({
+    "baseDeliveryFeeCents": cfg.BASE_DELIVERY_FEE_CENTS,
+    "minDeliveryFeeCents": cfg.MIN_DELIVERY_FEE_CENTS,
+    "maxDiscount": cfg.MAX_DISCOUNT,
+    "k": cfg.K,
+    "radiusM": cfg.RADIUS_M,
+    "t0Min": cfg.T0_MIN,
+    "minSoloUnits": cfg.MIN_SOLO_UNITS,
+    "availability": [
+        {
+            "daysOfWeek": [1, 2, 3, 4, 5],  # Mon–Fri
+            "startTime": "13:00",
+            "endTime": "17:00",
+        }
+    ],
+    "deliveryType": "motorcycle",
+})
+
+
 def create_schema():
+    tables = Base.metadata.sorted_tables
+    if engine.dialect.name == "postgresql":
+        # one to_regclass() probe for every table and index; on a warm DB this
+        # replaces create_all's per-table reflection queries
+        names = [t.name for t in tables] + [i.name for t in tables for i in t.indexes]
+        probes = [func.to_regclass(name) for name in names]
+        with engine.connect() as conn:
+            found = conn.execute(select(*probes)).one()
+        if None not in found:
+            return
+        # the first len(tables) probes are the tables themselves
+        existing = {t.name for t, oid in zip(tables, found) if oid is not None}
+    else:
+        existing = set(inspect(engine).get_table_names())
+
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips existing tables entirely, so add indexes declared
+    # after such a table was first created; new tables got theirs above
+    for table in tables:
+        if table.name not in existing:
+            continue
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
-def seed_products():
-    with db_session() as db:
-        count = db.query(Product).count()
-        if count > 0:
-            return
 
-        products = [
-            Product(id="p_1", name="Classic Cookie", price_cents=300, unit_factor=1),
-            Product(id="p_2", name="Double Choc", price_cents=350, unit_factor=1),
-            Product(id="p_3", name="Party Box (6)", price_cents=1600, unit_factor=6),
-        ]
-        db.add_all(products)
+def seed_products(db):
+    if db.scalar(select(select(Product.id).exists())):
+        return
 
+    products = [
+        {"id": "p_1", "name": "Classic Cookie", "price_cents": 300, "unit_factor": 1},
+        {"id": "p_2", "name": "Double Choc", "price_cents": 350, "unit_factor": 1},
+        {"id": "p_3", "name": "Party Box (6)", "price_cents": 1600, "unit_factor": 6},
+    ]
+    # Core insert: static seed rows need no identity map / unit-of-work
+    db.execute(insert(Product), products)
 
-def seed_slots():
+
+def seed_slots(db):
     """
     Ensure we always have delivery slots for the next N days.
     """
-    days_ahead = 3
-
-    with db_session() as db:
-        today = datetime.utcnow().date()
-
-        for i in range(days_ahead):
-            day = today + timedelta(days=i)
-            for hour in range(12, 20):  # 12:00–20:00
-                slot_id = f"sl_{day.strftime('%Y%m%d')}_{hour}"
-                existing = db.get(DeliverySlot, slot_id)
-                if existing:
-                    continue
-
-                start = datetime.combine(day, dtime(hour, 0))
-                end = start + timedelta(hours=1)
-
-                slot = DeliverySlot(
-                    id=slot_id,
-                    start_at=start,
-                    end_at=end,
-                    capacity_total=10,
-                    capacity_used=0,
-                )
-                db.add(slot)
-
-
-def seed_settings():
-    with db_session() as db:
-        existing = db.get(Setting, "global")
-        if existing:
-            return
-
-        default = {
-            "baseDeliveryFeeCents": cfg.BASE_DELIVERY_FEE_CENTS,
-            "minDeliveryFeeCents": cfg.MIN_DELIVERY_FEE_CENTS,
-            "maxDiscount": cfg.MAX_DISCOUNT,
-            "k": cfg.K,
-            "radiusM": cfg.RADIUS_M,
-            "t0Min": cfg.T0_MIN,
-            "minSoloUnits": cfg.MIN_SOLO_UNITS,
-            "availability": [
+    days_ahead = cfg.SEED_SLOT_DAYS
+    hours = range(12, 20)  # 12:00–20:00
+    slot_len = timedelta(hours=1)
+    # per-hour offsets are the same every day, so build them once
+    hour_offsets = [(hour, timedelta(hours=hour)) for hour in hours]
+
+    # columns are naive UTC, so drop tzinfo once on the base timestamp
+    today = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0, tzinfo=None
+    )
+
+    rows = []
+    for i in range(days_ahead):
+        midnight = today + timedelta(days=i)
+        day_key = midnight.strftime("%Y%m%d")
+        for hour, offset in hour_offsets:
+            start = midnight + offset
+            end = start + slot_len
+
+            rows.append(
                 {
-                    "daysOfWeek": [1, 2, 3, 4, 5],  # Mon–Fri
-                    "startTime": "13:00",
-                    "endTime": "17:00",
+                    "id": f"sl_{day_key}_{hour}",
+                    "start_at": start,
+                    "end_at": end,
+                    "capacity_total": 10,
+                    "capacity_used": 0,
                 }
-            ],
-            "deliveryType": "motorcycle",
-        }
-        s = Setting(key="global", value=default)
-        db.add(s)
+            )
+
+    # one id probe for the whole horizon instead of a PK lookup per slot
+    existing = set(
+        db.scalars(
+            select(DeliverySlot.id).where(
+                DeliverySlot.id.in_([r["id"] for r in rows])
+            )
+        )
+    )
+    rows = [r for r in rows if r["id"] not in existing]
+
+    if len(rows) >= _COPY_MIN_ROWS and engine.dialect.driver == "psycopg2":
+        _copy_slots(db, rows)
+        return
+
+    # one executemany (batched by insertmanyvalues) instead of per-row ORM adds
+    if rows:
+        stmt = insert(DeliverySlot)
+        if engine.dialect.name == "postgresql":
+            # another worker may be seeding the same ids concurrently
+            stmt = pg_insert(DeliverySlot).on_conflict_do_nothing(
+                index_elements=["id"]
+            )
+        db.execute(stmt, rows)
+
+
+def _copy_slots(db, rows):
+    """
+    Stream slot rows through COPY FROM STDIN (psycopg2 only).
+
+    COPY has no ON CONFLICT, so the rows go to a temp table first and are
+    moved over with INSERT ... SELECT ... ON CONFLICT DO NOTHING: another
+    worker seeding the same ids between the id probe and this insert must
+    not fail startup.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        writer.writerow(
+            [
+                r["id"],
+                r["start_at"].isoformat(),
+                r["end_at"].isoformat(),
+                "default",
+                r["capacity_total"],
+                r["capacity_used"],
+            ]
+        )
+    buf.seek(0)
+
+    cols = "id, start_at, end_at, region_id, capacity_total, capacity_used"
+    # use the session's own DBAPI connection so COPY joins its transaction
+    cur = db.connection().connection.cursor()
+    try:
+        cur.execute(
+            "CREATE TEMP TABLE seed_delivery_slots "
+            "(LIKE delivery_slots) ON COMMIT DROP"
+        )
+        cur.copy_expert(
+            f"COPY seed_delivery_slots ({cols}) FROM STDIN WITH CSV", buf
+        )
+        cur.execute(
+            f"INSERT INTO delivery_slots ({cols}) "
+            f"SELECT {cols} FROM seed_delivery_slots "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    finally:
+        cur.close()
+
+
+def seed_settings(db):
+    existing = db.get(Setting, "global")
+    if existing:
+        return
+
+    db.add(Setting(key="global", value=copy.deepcopy(dict(_DEFAULT_GLOBAL_SETTINGS))))
 
 
 def bootstrap():
     create_schema()
-    seed_products()
-    seed_slots()
-    seed_settings()
+    # all seeds share one session so startup commits a single transaction
+    with db_session(fast=True) as db:
+        seed_products(db)
+        seed_slots(db)
+        seed_settings(db)
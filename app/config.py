@@ -4,6 +4,9 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Core DB
     DATABASE_URL: str = "postgresql://smart:smart@db:5432/smart"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_RECYCLE_S: int = 1800
 
     # Scoring / discounts
     BASE_DELIVERY_FEE_CENTS: int = 450
@@ -15,12 +18,32 @@ class Settings(BaseSettings):
     MIN_SOLO_UNITS: int = 6
     S_MIN: float = 0.05  # minimum score to be considered batchable
 
+    # Days of hourly delivery slots seed_slots keeps ahead of today
+    SEED_SLOT_DAYS: int = 3
+
+    # How long the global settings row is cached in-process (seconds)
+    SETTINGS_CACHE_TTL_S: float = 60.0
+
     # Delivery mode used by scoring (affects decay)
     # Allowed: "car", "motorcycle", "bicycle"
     DELIVERY_TYPE: str = "motorcycle"
 
     # Routing
     ROUTING_BASE_URL: str = "https://router.project-osrm.org"
+    ROUTING_TIMEOUT_S: float = 10.0
+    ROUTING_MAX_CONNECTIONS: int = 64
+    ROUTING_MAX_KEEPALIVE: int = 32
+    ROUTING_KEEPALIVE_EXPIRY_S: float = 30.0
+    # Multiplex concurrent OSRM calls over one connection (server must speak h2)
+    ROUTING_HTTP2: bool = False
+    # Score slots on OSRM road distances (one /table call per request)
+    # instead of great-circle distances
+    USE_OSRM_TABLE: bool = False
+    ROUTING_CACHE_TTL_S: float = 600.0
+    ROUTING_CACHE_SIZE: int = 65_536
+    # OSRM cache key precision: 4 decimals is a ~10 m bucket, so users on
+    # the same block share entries
+    ROUTING_CACHE_DECIMALS: int = 4
 
     # Optional: used for CORS / frontend
     APP_DOMAIN: str | None = None
@@ -1,15 +1,40 @@
 from contextlib import contextmanager
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, make_url
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+_engine_kwargs = {}
+if make_url(settings.DATABASE_URL).drivername in ("postgresql", "postgresql+psycopg2"):
+    # size the pool for FastAPI's threadpool and batch executemany via psycopg2
+    _engine_kwargs = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_S,
+        executemany_mode="values_plus_batch",
+    )
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    **_engine_kwargs,
+)
+SessionLocal = sessionmaker(
+    bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
+)
 
 @contextmanager
-def db_session():
+def db_session(fast: bool = False):
+    """
+    Transactional session scope.
+
+    fast=True is meant for bulk/seed writes: on Postgres it turns off
+    synchronous_commit for this transaction only, so the commit does not
+    wait for the WAL fsync.
+    """
     session = SessionLocal()
     try:
+        if fast and engine.dialect.name == "postgresql":
+            session.execute(text("SET LOCAL synchronous_commit = off"))
         yield session
         session.commit()
     except:
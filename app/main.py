@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import math
-from datetime import datetime, timedelta, timezone, time as dtime
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from typing import List
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import select, and_
+import anyio
 import httpx
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import and_, case, func, insert, select, text, update
 
 from .config import settings
-from .db import db_session
+from .db import db_session, engine
 from .models import (
     Product,
     Cart,
@@ -22,12 +26,23 @@ from .models import (
     Order
 )
 from .bootstrap import bootstrap
+from .routing import (
+    RoutingError,
+    call_osrm_table,
+    close_client,
+    get_travel_estimates,
+    road_distances_m,
+)
+from .util import gen_id
 from .scoring import (
     score_slot,
+    score_slots,
     discount_from_score,
     clamp_fee,
     solo_minimum_required,
-    haversine_m,
+    neighbors_within,
+    NeighborIndex,
+    bounding_box,
 )
 from .schemas import (
     CreateCartRequest,
@@ -45,12 +60,27 @@ from .schemas import (
     AvailabilityWindow,
     RoutingEstimateResponse,
     TravelDurations,
+    RoutingBatchRequest,
+    RoutingBatchResponse,
+    TravelDurationMatrices,
 )
 
 # Ensure schema + seed on startup import
 bootstrap()
 
-app = FastAPI(title="Smart Delivery API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # release the pooled OSRM connections on shutdown
+    await close_client()
+
+
+app = FastAPI(
+    title="Smart Delivery API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 
 # ----------------------
@@ -75,41 +105,103 @@ app.add_middleware(
 # ----------------------
 
 
+def utcnow() -> datetime:
+    """
+    Request-scoped "now": injected with Depends so a request reads the clock once.
+    """
+    return datetime.now(timezone.utc)
+
+
 def parse_iso_z(s: str) -> datetime:
     return datetime.fromisoformat(s.replace("Z", "+00:00"))
 
 
 def params_snapshot() -> dict:
-    return {
-        "baseDeliveryFeeCents": settings.BASE_DELIVERY_FEE_CENTS,
-        "minDeliveryFeeCents": settings.MIN_DELIVERY_FEE_CENTS,
-        "maxDiscount": settings.MAX_DISCOUNT,
-        "k": settings.K,
-        "radiusM": settings.RADIUS_M,
-        "t0Min": settings.T0_MIN,
-        "minSoloUnits": settings.MIN_SOLO_UNITS,
-        "deliveryType": getattr(settings, "DELIVERY_TYPE", "motorcycle"),
-    }
+    # rebuilt only after apply_settings_to_runtime() changes the settings
+    snap = _runtime["params"]
+    if snap is None:
+        snap = _runtime["params"] = {
+            "baseDeliveryFeeCents": settings.BASE_DELIVERY_FEE_CENTS,
+            "minDeliveryFeeCents": settings.MIN_DELIVERY_FEE_CENTS,
+            "maxDiscount": settings.MAX_DISCOUNT,
+            "k": settings.K,
+            "radiusM": settings.RADIUS_M,
+            "t0Min": settings.T0_MIN,
+            "minSoloUnits": settings.MIN_SOLO_UNITS,
+            "deliveryType": getattr(settings, "DELIVERY_TYPE", "motorcycle"),
+        }
+    return snap
 
 
-def calc_cart_subtotal_cents_by_id(db, cart_id: str) -> int:
-    cart = db.get(Cart, cart_id)
-    if not cart:
-        raise HTTPException(404, detail="Cart not found")
-    subtotal = 0
-    for item in cart.items:
-        subtotal += item.qty * item.product.price_cents
-    return subtotal
+def cart_aggregates_by_id(db, cart_id: str) -> tuple[int, int]:
+    """
+    Return (subtotal_cents, total_units) for a cart in a single query.
+    """
+    subtotal, units = db.execute(
+        select(
+            func.coalesce(func.sum(CartItem.qty * Product.price_cents), 0),
+            func.coalesce(func.sum(CartItem.qty * Product.unit_factor), 0),
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.cart_id == cart_id)
+    ).one()
+    return int(subtotal), int(units)
 
 
-def cart_units_total_by_id(db, cart_id: str) -> int:
-    cart = db.get(Cart, cart_id)
-    if not cart:
-        raise HTTPException(404, detail="Cart not found")
-    total_units = 0
-    for item in cart.items:
-        total_units += item.qty * item.product.unit_factor
-    return total_units
+def stops_in_window(
+    db,
+    win_start: datetime,
+    win_end: datetime,
+    lat: float,
+    lon: float,
+    radius_m: float,
+) -> list:
+    """
+    Scheduled stops in [win_start, win_end] that may lie within radius_m of
+    (lat, lon), ordered by time.
+
+    Only (lat, lon, scheduled_at) is loaded, as lightweight rows rather than
+    full ORM instances: scoring reads nothing else, and the covering index on
+    those columns lets Postgres answer from the index alone. The database
+    also drops stops outside the radius' lat/lon bounding box, so they are
+    never shipped over the wire; the exact radius test stays with
+    neighbors_within.
+    """
+    dlat, dlon = bounding_box(lat, radius_m)
+    conds = [
+        ScheduledStop.scheduled_at >= win_start,
+        ScheduledStop.scheduled_at <= win_end,
+        ScheduledStop.lat.between(lat - dlat, lat + dlat),
+    ]
+    # a box crossing the antimeridian is not one lon range; skip that bound
+    if -180.0 <= lon - dlon and lon + dlon <= 180.0:
+        conds.append(ScheduledStop.lon.between(lon - dlon, lon + dlon))
+
+    return db.execute(
+        select(ScheduledStop.lat, ScheduledStop.lon, ScheduledStop.scheduled_at)
+        .where(and_(*conds))
+        .order_by(ScheduledStop.scheduled_at)
+    ).all()
+
+
+def scoring_distances(lat: float, lon: float, stops: list, dists: list) -> list:
+    """
+    Distances to score stops on: with USE_OSRM_TABLE on, OSRM road distances
+    from (lat, lon) fetched in one /table call; otherwise (or if OSRM fails,
+    or for unreachable stops) the great-circle dists from the radius gate.
+    Must run in a worker thread (sync endpoint), as it hops onto the event loop.
+    """
+    if not settings.USE_OSRM_TABLE or not stops:
+        return dists
+
+    profile = "cycling" if settings.DELIVERY_TYPE == "bicycle" else "driving"
+    try:
+        road = anyio.from_thread.run(
+            road_distances_m, profile, (lat, lon), [(n.lat, n.lon) for n in stops]
+        )
+    except (RoutingError, httpx.HTTPError):
+        return dists
+    return [d if r is None else r for r, d in zip(road, dists)]
 
 
 # ----------------------
@@ -117,10 +209,46 @@ def cart_units_total_by_id(db, cart_id: str) -> int:
 # ----------------------
 
 
+# The global settings row changes rarely, so keep the parsed AppSettings
+# in-process for a short TTL instead of re-reading and re-validating the row
+# on every request. Other workers pick up a PUT within the TTL.
+_settings_cache: dict = {"value": None, "expires": 0.0}
+
+
+def invalidate_app_settings():
+    _settings_cache["value"] = None
+    _settings_cache["expires"] = 0.0
+
+
+def _settings_from_row(value: dict) -> AppSettings:
+    """
+    Build AppSettings from the stored row without re-validating it: the row
+    is only ever written from a validated model (PUT /settings, seed).
+    model_construct() does not recurse, so the windows are built explicitly.
+    """
+    return AppSettings.model_construct(
+        **{
+            **value,
+            "availability": [
+                AvailabilityWindow.model_construct(**w)
+                for w in value.get("availability", [])
+            ],
+        }
+    )
+
+
 def load_app_settings(db) -> AppSettings:
+    now = time.monotonic()
+    cached = _settings_cache["value"]
+    if cached is not None and _settings_cache["expires"] > now:
+        return cached
+
     rec = db.get(Setting, "global")
     if rec:
-        return AppSettings(**rec.value)
+        cfg_model = _settings_from_row(rec.value)
+        _settings_cache["value"] = cfg_model
+        _settings_cache["expires"] = now + settings.SETTINGS_CACHE_TTL_S
+        return cfg_model
 
     # Fallback to env defaults if row missing
     return AppSettings(
@@ -140,7 +268,16 @@ def load_app_settings(db) -> AppSettings:
     )
 
 
+# Last AppSettings pushed into the runtime config, and the params snapshot
+# derived from it. The settings cache hands back the same model object until
+# it changes, so re-applying it can be skipped.
+_runtime: dict = {"applied": None, "params": None}
+
+
 def apply_settings_to_runtime(cfg_model: AppSettings):
+    if cfg_model is _runtime["applied"]:
+        return
+
     settings.BASE_DELIVERY_FEE_CENTS = cfg_model.baseDeliveryFeeCents
     settings.MIN_DELIVERY_FEE_CENTS = cfg_model.minDeliveryFeeCents
     settings.MAX_DISCOUNT = cfg_model.maxDiscount
@@ -149,19 +286,49 @@ def apply_settings_to_runtime(cfg_model: AppSettings):
     settings.T0_MIN = cfg_model.t0Min
     settings.MIN_SOLO_UNITS = cfg_model.minSoloUnits
     settings.DELIVERY_TYPE = cfg_model.deliveryType
+    _runtime["applied"] = cfg_model
+    _runtime["params"] = None
 
 
-def slot_allowed(start_at: datetime, cfg_model: AppSettings) -> bool:
-    dow = start_at.isoweekday()
-    t = start_at.time()
+# Availability windows of the last AppSettings seen by slot_allowed(),
+# compiled to per-weekday (start, end) seconds-of-day so the "HH:MM" strings
+# are parsed once per settings change rather than once per slot.
+# Published as one (model, by_dow) tuple so a concurrent reader (sync
+# endpoints share the threadpool) never sees one half updated.
+_availability: tuple = (None, None)
+
+
+def _seconds_of_day(hhmm: str) -> int:
+    h, m = map(int, hhmm.split(":"))
+    return h * 3600 + m * 60
+
+
+def _availability_by_dow(cfg_model: AppSettings) -> dict:
+    global _availability
+    model, by_dow = _availability
+    if cfg_model is model:
+        return by_dow
+
+    by_dow = {dow: [] for dow in range(1, 8)}
     for w in cfg_model.availability:
-        if dow not in w.daysOfWeek:
-            continue
-        sh, sm = map(int, w.startTime.split(":"))
-        eh, em = map(int, w.endTime.split(":"))
-        start_t = dtime(sh, sm)
-        end_t = dtime(eh, em)
-        if start_t <= t <= end_t:
+        bounds = (_seconds_of_day(w.startTime), _seconds_of_day(w.endTime))
+        for dow in w.daysOfWeek:
+            if dow in by_dow:
+                by_dow[dow].append(bounds)
+    _availability = (cfg_model, by_dow)
+    return by_dow
+
+
+def slot_allowed(start_at: datetime, cfg_model: AppSettings) -> bool:
+    windows = _availability_by_dow(cfg_model)[start_at.isoweekday()]
+    t = (
+        start_at.hour * 3600
+        + start_at.minute * 60
+        + start_at.second
+        + start_at.microsecond / 1e6
+    )
+    for start_s, end_s in windows:
+        if start_s <= t <= end_s:
             return True
     return False
 
@@ -182,15 +349,19 @@ def get_app_settings():
 @app.put("/settings", response_model=AppSettings)
 def update_app_settings(payload: AppSettings):
     with db_session() as db:
+        value = payload.model_dump()
         rec = db.get(Setting, "global")
         if rec:
-            rec.value = payload.dict()
+            rec.value = value
         else:
-            rec = Setting(key="global", value=payload.dict())
+            rec = Setting(key="global", value=value)
             db.add(rec)
         db.flush()
         apply_settings_to_runtime(payload)
-        return payload
+
+    # drop the cached settings only once the new value is committed
+    invalidate_app_settings()
+    return payload
 
 
 # ----------------------
@@ -212,9 +383,9 @@ def create_cart(body: CreateCartRequest):
         if len(products) != len(set(product_ids)):
             raise HTTPException(400, detail="Unknown productId in items")
 
-        cart = Cart()
+        # id assigned up front so no flush is needed before adding items
+        cart = Cart(id=gen_id("c"))
         db.add(cart)
-        db.flush()
 
         for item in body.items:
             if item.qty <= 0:
@@ -226,7 +397,6 @@ def create_cart(body: CreateCartRequest):
             )
             db.add(ci)
 
-        db.flush()
         return CreateCartResponse(cartId=cart.id)
 
 
@@ -242,16 +412,16 @@ def get_slots(
     lon: float = Query(...),
     fromISO: str | None = Query(None),
     toISO: str | None = Query(None),
+    now: datetime = Depends(utcnow),
 ):
     with db_session() as db:
-        cart = db.get(Cart, cartId)
-        if not cart:
+        # only existence matters here; items are never touched by slot listing
+        if not db.scalar(select(select(Cart.id).where(Cart.id == cartId).exists())):
             raise HTTPException(404, detail="Cart not found")
 
         cfg_model = load_app_settings(db)
         apply_settings_to_runtime(cfg_model)
 
-        now = datetime.now(timezone.utc)
         start_time = parse_iso_z(fromISO) if fromISO else now
         end_time = parse_iso_z(toISO) if toISO else now + timedelta(days=7)
 
@@ -261,6 +431,8 @@ def get_slots(
                     and_(
                         DeliverySlot.start_at >= start_time,
                         DeliverySlot.start_at <= end_time,
+                        # full slots cannot take another delivery; never score them
+                        DeliverySlot.capacity_used < DeliverySlot.capacity_total,
                     )
                 )
             )
@@ -273,67 +445,74 @@ def get_slots(
 
         out: List[SlotOut] = []
 
-        for s in sorted(slots, key=lambda x: x.start_at):
-            # neighbor time window around slot
-            win_start = s.start_at - timedelta(minutes=settings.T0_MIN)
-            win_end = s.end_at + timedelta(minutes=settings.T0_MIN)
-
-            neigh = (
-                db.execute(
-                    select(ScheduledStop).where(
-                        and_(
-                            ScheduledStop.scheduled_at >= win_start,
-                            ScheduledStop.scheduled_at <= win_end,
-                        )
-                    )
-                )
-                .scalars()
-                .all()
-            )
-            neighbors = [
-                n
-                for n in neigh
-                if haversine_m(lat, lon, n.lat, n.lon) <= settings.RADIUS_M
-            ]
-
-            score = score_slot(lat, lon, s, neighbors)
-            disc_pct = discount_from_score(score)
-            final_fee, discount_cents, base_fee = clamp_fee(
-                cfg_model.baseDeliveryFeeCents, disc_pct
-            )
-            requires_solo = solo_minimum_required(score, len(neighbors))
-
-            if disc_pct >= settings.MAX_DISCOUNT * 0.7:
-                label = "Best deal"
-            elif disc_pct >= settings.MAX_DISCOUNT * 0.3:
-                label = "Good deal"
-            else:
-                label = "Standard"
-
-            out.append(
-                SlotOut(
-                    slotId=s.id,
-                    startAt=s.start_at.replace(tzinfo=timezone.utc),
-                    endAt=s.end_at.replace(tzinfo=timezone.utc),
-                    baseDeliveryFeeCents=base_fee,
-                    discountPct=round(disc_pct, 4),
-                    discountCents=discount_cents,
-                    finalDeliveryFeeCents=final_fee,
-                    label=label,
-                    capacity=SlotCapacity(
-                        total=s.capacity_total, used=s.capacity_used
-                    ),
-                    requiresSoloMinUnits=requires_solo,
-                    soloMinUnits=cfg_model.minSoloUnits,
-                )
-            )
+        # settings are fixed for the rest of the request; read them once
+        t0_window = timedelta(minutes=settings.T0_MIN)
+        t0_window_s = settings.T0_MIN * 60.0
+        radius_m = settings.RADIUS_M
+        best_deal_pct = settings.MAX_DISCOUNT * 0.7
+        good_deal_pct = settings.MAX_DISCOUNT * 0.3
+
+        slots.sort(key=lambda x: x.start_at)
+
+        # One query for the stops covering every slot's window, radius-filtered
+        # once (it does not depend on the slot); each slot then takes its
+        # window from the index by bisection.
+        neigh = []
+        if slots:
+            stops_from = slots[0].start_at - t0_window
+            stops_to = max(x.end_at for x in slots) + t0_window
+            neigh = stops_in_window(db, stops_from, stops_to, lat, lon, radius_m)
+
+    # Scoring runs after the session is closed: with USE_OSRM_TABLE on it
+    # waits on OSRM, which must not hold a pooled DB connection meanwhile.
+    neighbors, distances = neighbors_within(lat, lon, neigh, radius_m)
+    distances = scoring_distances(lat, lon, neighbors, distances)
+    nearby = NeighborIndex(neighbors, distances)
+    scores = score_slots(slots, nearby, t0_window_s)
+
+    for s, (score, neighbor_count) in zip(slots, scores):
+        disc_pct = discount_from_score(score)
+        final_fee, discount_cents, base_fee = clamp_fee(
+            cfg_model.baseDeliveryFeeCents, disc_pct
+        )
+        requires_solo = solo_minimum_required(score, neighbor_count)
 
-        return SlotsResponse(
-            computedAt=now,
-            params=params_snapshot(),
-            slots=out,
+        if disc_pct >= best_deal_pct:
+            label = "Best deal"
+        elif disc_pct >= good_deal_pct:
+            label = "Good deal"
+        else:
+            label = "Standard"
+
+        # every field is computed server-side, so skip validation
+        out.append(
+            SlotOut.model_construct(
+                slotId=s.id,
+                startAt=s.start_at.replace(tzinfo=timezone.utc),
+                endAt=s.end_at.replace(tzinfo=timezone.utc),
+                baseDeliveryFeeCents=base_fee,
+                discountPct=round(disc_pct, 4),
+                discountCents=discount_cents,
+                finalDeliveryFeeCents=final_fee,
+                label=label,
+                capacity=SlotCapacity.model_construct(
+                    total=s.capacity_total, used=s.capacity_used
+                ),
+                requiresSoloMinUnits=requires_solo,
+                soloMinUnits=cfg_model.minSoloUnits,
+            )
         )
 
+    # Serialize straight from the constructed model: returning it would
+    # have FastAPI dump it to dicts and validate it against
+    # response_model all over again.
+    resp = SlotsResponse.model_construct(
+        computedAt=now,
+        params=params_snapshot(),
+        slots=out,
+    )
+    return Response(content=resp.model_dump_json(), media_type="application/json")
+
 
 # ----------------------
 # Checkout / Quote
@@ -341,38 +520,37 @@ def get_slots(
 
 
 @app.post("/checkout/quote", response_model=QuoteOut)
-def checkout_quote(payload: QuoteIn):
+def checkout_quote(payload: QuoteIn, now: datetime = Depends(utcnow)):
     with db_session() as db:
         cart = db.get(Cart, payload.cartId)
         slot = db.get(DeliverySlot, payload.slotId)
         if not (cart and slot):
             raise HTTPException(404, detail="cart/slot not found")
+        # same rule as the slot listing: a full slot is not offered or quoted
+        if slot.capacity_used >= slot.capacity_total:
+            raise HTTPException(409, detail="slot is full")
 
         cfg_model = load_app_settings(db)
         apply_settings_to_runtime(cfg_model)
 
         win_start = slot.start_at - timedelta(minutes=settings.T0_MIN)
         win_end = slot.end_at + timedelta(minutes=settings.T0_MIN)
-        neigh = (
-            db.execute(
-                select(ScheduledStop).where(
-                    and_(
-                        ScheduledStop.scheduled_at >= win_start,
-                        ScheduledStop.scheduled_at <= win_end,
-                    )
-                )
-            )
-            .scalars()
-            .all()
+        neigh = stops_in_window(
+            db, win_start, win_end, payload.lat, payload.lon, settings.RADIUS_M
         )
-        neighbors = [
-            n
-            for n in neigh
-            if haversine_m(payload.lat, payload.lon, n.lat, n.lon)
-            <= settings.RADIUS_M
-        ]
-
-        score = score_slot(payload.lat, payload.lon, slot, neighbors)
+        subtotal, units = cart_aggregates_by_id(db, cart.id)
+
+        neighbors, distances = neighbors_within(
+            payload.lat, payload.lon, neigh, settings.RADIUS_M
+        )
+        if settings.USE_OSRM_TABLE and neighbors:
+            # the /table call below waits on OSRM; end the read transaction
+            # so it does not hold a pooled connection meanwhile (the INSERT
+            # further down checks one out again)
+            db.commit()
+        distances = scoring_distances(payload.lat, payload.lon, neighbors, distances)
+
+        score = score_slot(payload.lat, payload.lon, slot, neighbors, distances)
         disc_pct = discount_from_score(score)
         final_fee, discount_cents, base_fee = clamp_fee(
             cfg_model.baseDeliveryFeeCents, disc_pct
@@ -380,7 +558,6 @@ def checkout_quote(payload: QuoteIn):
 
         # enforce solo-minimum if applicable
         if solo_minimum_required(score, len(neighbors)):
-            units = cart_units_total_by_id(db, cart.id)
             if units < cfg_model.minSoloUnits:
                 raise HTTPException(
                     status_code=400,
@@ -391,7 +568,6 @@ def checkout_quote(payload: QuoteIn):
                     },
                 )
 
-        subtotal = calc_cart_subtotal_cents_by_id(db, cart.id)
         total = subtotal + final_fee
 
         q = Quote(
@@ -401,7 +577,7 @@ def checkout_quote(payload: QuoteIn):
             delivery_fee_cents=final_fee,
             discount_cents=discount_cents,
             total_cents=total,
-            locked_until=datetime.now(timezone.utc) + timedelta(minutes=15),
+            locked_until=now + timedelta(minutes=15),
             lat=payload.lat,
             lon=payload.lon,
         )
@@ -443,8 +619,21 @@ def payment_webhook(body: WebhookPaymentIn):
         if not q:
             raise HTTPException(404, detail="Quote not found")
 
-        slot = db.get(DeliverySlot, q.slot_id)
-        if not slot:
+        # Bump slot used capacity (capped at capacity_total) in one atomic
+        # UPDATE, which also hands back the slot time for the stop below.
+        used = func.coalesce(DeliverySlot.capacity_used, 0) + 1
+        slot_start_at = db.scalar(
+            update(DeliverySlot)
+            .where(DeliverySlot.id == q.slot_id)
+            .values(
+                capacity_used=case(
+                    (used > DeliverySlot.capacity_total, DeliverySlot.capacity_total),
+                    else_=used,
+                )
+            )
+            .returning(DeliverySlot.start_at)
+        )
+        if slot_start_at is None:
             raise HTTPException(404, detail="Slot not found for quote")
 
         # Either find an existing order for this cart+slot, or create a new one
@@ -477,18 +666,13 @@ def payment_webhook(body: WebhookPaymentIn):
             db.flush()  # ensure order.id is available for FK
 
         # Now create the scheduled stop, linked to the *order* id
-        stop = ScheduledStop(
-            order_id=order.id,
-            lat=q.lat,
-            lon=q.lon,
-            scheduled_at=slot.start_at,
-        )
-        db.add(stop)
-
-        # bump slot used capacity
-        slot.capacity_used = min(
-            slot.capacity_total,
-            (slot.capacity_used or 0) + 1,
+        db.execute(
+            insert(ScheduledStop).values(
+                order_id=order.id,
+                lat=q.lat,
+                lon=q.lon,
+                scheduled_at=slot_start_at,
+            )
         )
 
     return {"status": "ok"}
@@ -510,12 +694,20 @@ def dev_clear_db(full: bool = False):
       (but keeps the slots themselves).
     """
     with db_session() as db:
-        # Delete in foreign-key-safe order
-        db.query(ScheduledStop).delete()  # FK -> orders.id
-        db.query(Quote).delete()          # FK -> carts.id, delivery_slots.id
-        db.query(Order).delete()          # FK -> carts.id
-        db.query(CartItem).delete()       # FK -> carts.id
-        db.query(Cart).delete()
+        if engine.dialect.name == "postgresql":
+            # One metadata-only statement instead of five table scans
+            tables = ", ".join(
+                m.__tablename__
+                for m in (ScheduledStop, Quote, Order, CartItem, Cart)
+            )
+            db.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        else:
+            # Delete in foreign-key-safe order
+            db.query(ScheduledStop).delete()  # FK -> orders.id
+            db.query(Quote).delete()          # FK -> carts.id, delivery_slots.id
+            db.query(Order).delete()          # FK -> carts.id
+            db.query(CartItem).delete()       # FK -> carts.id
+            db.query(Cart).delete()
 
         if full:
             # Do NOT delete products (per requirement).
@@ -543,40 +735,28 @@ def debug_neighbors(
         win_start = slot.start_at - timedelta(minutes=settings.T0_MIN)
         win_end = slot.end_at + timedelta(minutes=settings.T0_MIN)
 
-        neigh = (
-            db.execute(
-                select(ScheduledStop).where(
-                    and_(
-                        ScheduledStop.scheduled_at >= win_start,
-                        ScheduledStop.scheduled_at <= win_end,
-                    )
-                )
-            )
-            .scalars()
-            .all()
-        )
-        neighbors = [
-            n
-            for n in neigh
-            if haversine_m(lat, lon, n.lat, n.lon) <= settings.RADIUS_M
-        ]
+        neigh = stops_in_window(db, win_start, win_end, lat, lon, settings.RADIUS_M)
 
-        score = score_slot(lat, lon, slot, neighbors)
-        disc_pct = discount_from_score(score)
-        final_fee, discount_cents, base_fee = clamp_fee(
-            cfg_model.baseDeliveryFeeCents, disc_pct
-        )
+    # outside the session, as OSRM may be called (see get_slots)
+    neighbors, distances = neighbors_within(lat, lon, neigh, settings.RADIUS_M)
+    distances = scoring_distances(lat, lon, neighbors, distances)
 
-        return {
-            "slotId": slotId,
-            "neighborsCount": len(neighbors),
-            "score": score,
-            "discountPct": disc_pct,
-            "finalFeeCents": final_fee,
-            "discountCents": discount_cents,
-            "baseFeeCents": base_fee,
-            "deliveryType": getattr(settings, "DELIVERY_TYPE", "motorcycle"),
-        }
+    score = score_slot(lat, lon, slot, neighbors, distances)
+    disc_pct = discount_from_score(score)
+    final_fee, discount_cents, base_fee = clamp_fee(
+        cfg_model.baseDeliveryFeeCents, disc_pct
+    )
+
+    return {
+        "slotId": slotId,
+        "neighborsCount": len(neighbors),
+        "score": score,
+        "discountPct": disc_pct,
+        "finalFeeCents": final_fee,
+        "discountCents": discount_cents,
+        "baseFeeCents": base_fee,
+        "deliveryType": getattr(settings, "DELIVERY_TYPE", "motorcycle"),
+    }
 
 
 # ----------------------
@@ -584,28 +764,6 @@ def debug_neighbors(
 # ----------------------
 
 
-class RoutingError(Exception):
-    pass
-
-
-async def call_osrm_route(profile: str, from_lat: float, from_lon: float, to_lat: float, to_lon: float) -> tuple[float, float]:
-    base = settings.ROUTING_BASE_URL.rstrip("/")
-    url = (
-        f"{base}/route/v1/{profile}/"
-        f"{from_lon},{from_lat};{to_lon},{to_lat}"
-        "?overview=false&alternatives=false&steps=false"
-    )
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url)
-    if r.status_code != 200:
-        raise RoutingError(f"OSRM error: HTTP {r.status_code} - {r.text}")
-    data = r.json()
-    if data.get("code") != "Ok" or not data.get("routes"):
-        raise RoutingError(f"OSRM error: {data.get('message', 'no routes')}")
-    route = data["routes"][0]
-    return float(route["distance"]), float(route["duration"])
-
-
 @app.get("/routing/estimate", response_model=RoutingEstimateResponse)
 async def routing_estimate(
     fromLat: float = Query(...),
@@ -617,31 +775,52 @@ async def routing_estimate(
     OSRM-based distance + duration for car/motorcycle/bicycle.
     Motorcycle currently approximated from car.
     """
-    # car
-    dist_car, dur_car = await call_osrm_route(
-        "driving", fromLat, fromLon, toLat, toLon
-    )
-
-    # bike
-    try:
-        dist_bike, dur_bike = await call_osrm_route(
-            "cycling", fromLat, fromLon, toLat, toLon
-        )
-    except RoutingError:
-        dist_bike, dur_bike = dist_car, dur_car * 2.5
-
-    # motorcycle as faster car
-    dist_moto, dur_moto = dist_car, dur_car * 0.8
-
+    est = await get_travel_estimates(fromLat, fromLon, toLat, toLon)
     return RoutingEstimateResponse(
         fromLat=fromLat,
         fromLon=fromLon,
         toLat=toLat,
         toLon=toLon,
-        distanceMeters=dist_car,
-        durationsSeconds=TravelDurations(
+        distanceMeters=est["distanceMeters"],
+        durationsSeconds=TravelDurations(**est["durationsSeconds"]),
+        provider=est["provider"],
+    )
+
+
+def _scale_matrix(m: list[list[float | None]], factor: float) -> list[list[float | None]]:
+    return [[None if v is None else v * factor for v in row] for row in m]
+
+
+@app.post("/routing/estimate-batch", response_model=RoutingBatchResponse)
+async def routing_estimate_batch(body: RoutingBatchRequest):
+    """
+    Same estimates as /routing/estimate for every origin x destination pair,
+    using one OSRM /table call per profile instead of one /route per pair.
+    """
+    sources = [(p.lat, p.lon) for p in body.origins]
+    destinations = [(p.lat, p.lon) for p in body.destinations]
+
+    car, bike = await asyncio.gather(
+        call_osrm_table("driving", sources, destinations),
+        call_osrm_table("cycling", sources, destinations),
+        return_exceptions=True,
+    )
+    if isinstance(car, BaseException):
+        raise car
+    dist_car, dur_car = car
+
+    if isinstance(bike, RoutingError):
+        dur_bike = _scale_matrix(dur_car, 2.5)
+    elif isinstance(bike, BaseException):
+        raise bike
+    else:
+        dur_bike = bike[1]
+
+    return RoutingBatchResponse(
+        distancesMeters=dist_car,
+        durationsSeconds=TravelDurationMatrices(
             car=dur_car,
-            motorcycle=dur_moto,
+            motorcycle=_scale_matrix(dur_car, 0.8),
             bicycle=dur_bike,
         ),
         provider="osrm",
@@ -1,11 +1,16 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy import JSON
 from .util import gen_id 
 class Base(DeclarativeBase): pass
 
 
+def _utcnow_naive() -> datetime:
+    # DateTime columns hold naive UTC; datetime.utcnow() is deprecated
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Setting(Base):
     __tablename__ = "settings"
 
@@ -22,6 +27,10 @@ class Product(Base):
 
 class DeliverySlot(Base):
     __tablename__ = "delivery_slots"
+    __table_args__ = (
+        # slot listing is a start_at range scan
+        Index("ix_delivery_slots_start_at", "start_at"),
+    )
     id: Mapped[str] = mapped_column(String, primary_key=True)
     start_at: Mapped[datetime] = mapped_column(DateTime)
     end_at: Mapped[datetime] = mapped_column(DateTime)
@@ -33,11 +42,15 @@ class Cart(Base):
     __tablename__ = "carts"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: gen_id("c"))
     user_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=_utcnow_naive)
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # cart subtotal/units aggregate filters on cart_id
+        Index("ix_cart_items_cart_id", "cart_id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     cart_id: Mapped[str] = mapped_column(ForeignKey("carts.id"))
     product_id: Mapped[str] = mapped_column(ForeignKey("products.id"))
@@ -62,6 +75,10 @@ class Quote(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # payment webhook looks up an existing order by cart + slot
+        Index("ix_orders_cart_id_slot_id", "cart_id", "slot_id"),
+    )
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: gen_id("or"))
     user_id: Mapped[str | None] = mapped_column(String, nullable=True)
     cart_id: Mapped[str] = mapped_column(ForeignKey("carts.id"))
@@ -77,6 +94,11 @@ class Order(Base):
 
 class ScheduledStop(Base):
     __tablename__ = "scheduled_stops"
+    __table_args__ = (
+        # neighbor lookups filter on a scheduled_at window and read lat/lon;
+        # leading on scheduled_at keeps the range scan, lat/lon make it covering
+        Index("ix_scheduled_stops_scheduled_at_lat_lon", "scheduled_at", "lat", "lon"),
+    )
     id: Mapped[str] = mapped_column(String, primary_key=True,default=lambda: gen_id("st"))
     order_id: Mapped[str | None] = mapped_column(ForeignKey("orders.id"), nullable=True)
     lat: Mapped[float] = mapped_column(Float)
@@ -1,5 +1,10 @@
-import httpx
+import asyncio
+import time
+from collections import OrderedDict
 from typing import Literal
+
+import httpx
+
 from .config import settings
 
 OSRM_PROFILE = Literal["driving", "cycling", "walking"]
@@ -9,6 +14,90 @@ class RoutingError(Exception):
     pass
 
 
+# One pooled client for the whole process so OSRM calls reuse keep-alive
+# connections instead of paying a TCP/TLS handshake each time. The pool is
+# bounded so a burst of estimates cannot open unlimited sockets to OSRM.
+_client: httpx.AsyncClient | None = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=settings.ROUTING_HTTP2,
+            timeout=settings.ROUTING_TIMEOUT_S,
+            limits=httpx.Limits(
+                max_connections=settings.ROUTING_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ROUTING_MAX_KEEPALIVE,
+                keepalive_expiry=settings.ROUTING_KEEPALIVE_EXPIRY_S,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Route and table results keyed by (profile, coords rounded to
+# ROUTING_CACHE_DECIMALS places, ~10 m by default), LRU-evicted and expiring
+# after ROUTING_CACHE_TTL_S. Concurrent misses for the same key share one
+# in-flight request instead of all hitting OSRM.
+_route_cache: OrderedDict[tuple, tuple[float, tuple[float, float]]] = OrderedDict()
+_route_inflight: dict[tuple, asyncio.Task] = {}
+_table_cache: OrderedDict[tuple, tuple[float, tuple[list, list]]] = OrderedDict()
+_table_inflight: dict[tuple, asyncio.Task] = {}
+
+
+def _route_key(profile, from_lat, from_lon, to_lat, to_lon) -> tuple:
+    nd = settings.ROUTING_CACHE_DECIMALS
+    return (
+        profile,
+        round(from_lat, nd),
+        round(from_lon, nd),
+        round(to_lat, nd),
+        round(to_lon, nd),
+    )
+
+
+def _table_key(profile, sources, destinations) -> tuple:
+    nd = settings.ROUTING_CACHE_DECIMALS
+    return (
+        profile,
+        tuple((round(lat, nd), round(lon, nd)) for lat, lon in sources),
+        tuple((round(lat, nd), round(lon, nd)) for lat, lon in destinations),
+    )
+
+
+def _cache_done(cache: OrderedDict, inflight: dict, key: tuple, task: asyncio.Task):
+    inflight.pop(key, None)
+    if task.cancelled() or task.exception() is not None:
+        return
+    expires = time.monotonic() + settings.ROUTING_CACHE_TTL_S
+    cache[key] = (expires, task.result())
+    cache.move_to_end(key)
+    while len(cache) > settings.ROUTING_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+async def _cached(cache: OrderedDict, inflight: dict, key: tuple, fetch):
+    hit = cache.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        cache.move_to_end(key)
+        return hit[1]
+
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        inflight[key] = task
+        task.add_done_callback(lambda t: _cache_done(cache, inflight, key, t))
+    # shield: one caller going away must not cancel the shared request
+    return await asyncio.shield(task)
+
+
 async def call_osrm_route(
     profile: OSRM_PROFILE,
     from_lat: float,
@@ -18,8 +107,24 @@ async def call_osrm_route(
 ) -> tuple[float, float]:
     """
     Call OSRM /route API and return (distance_meters, duration_seconds)
-    for the given profile.
+    for the given profile. Results are cached by rounded coordinates.
     """
+    key = _route_key(profile, from_lat, from_lon, to_lat, to_lon)
+    return await _cached(
+        _route_cache,
+        _route_inflight,
+        key,
+        lambda: _fetch_osrm_route(profile, from_lat, from_lon, to_lat, to_lon),
+    )
+
+
+async def _fetch_osrm_route(
+    profile: OSRM_PROFILE,
+    from_lat: float,
+    from_lon: float,
+    to_lat: float,
+    to_lon: float,
+) -> tuple[float, float]:
     base = settings.ROUTING_BASE_URL.rstrip("/")
     # OSRM expects lon,lat order
     url = (
@@ -28,8 +133,7 @@ async def call_osrm_route(
         "?overview=false&alternatives=false&steps=false"
     )
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url)
+    r = await get_client().get(url)
     if r.status_code != 200:
         raise RoutingError(f"OSRM error: HTTP {r.status_code} - {r.text}")
 
@@ -43,6 +147,98 @@ async def call_osrm_route(
     return distance_m, duration_s
 
 
+async def call_osrm_table(
+    profile: OSRM_PROFILE,
+    sources: list[tuple[float, float]],
+    destinations: list[tuple[float, float]],
+) -> tuple[list[list[float | None]], list[list[float | None]]]:
+    """
+    Call OSRM /table API for every (source, destination) pair in one request.
+    Points are (lat, lon). Returns (distances_meters, durations_seconds)
+    matrices indexed [source][destination]; unreachable pairs are None.
+    Results are cached by rounded coordinates, so callers must not mutate
+    the returned matrices.
+    """
+    key = _table_key(profile, sources, destinations)
+    return await _cached(
+        _table_cache,
+        _table_inflight,
+        key,
+        lambda: _fetch_osrm_table(profile, sources, destinations),
+    )
+
+
+async def _fetch_osrm_table(
+    profile: OSRM_PROFILE,
+    sources: list[tuple[float, float]],
+    destinations: list[tuple[float, float]],
+) -> tuple[list[list[float | None]], list[list[float | None]]]:
+    base = settings.ROUTING_BASE_URL.rstrip("/")
+    # OSRM expects lon,lat order
+    coords = ";".join(f"{lon},{lat}" for lat, lon in [*sources, *destinations])
+    src_idx = ";".join(str(i) for i in range(len(sources)))
+    dst_idx = ";".join(
+        str(i) for i in range(len(sources), len(sources) + len(destinations))
+    )
+    url = (
+        f"{base}/table/v1/{profile}/{coords}"
+        f"?sources={src_idx}&destinations={dst_idx}"
+        "&annotations=distance,duration"
+    )
+
+    r = await get_client().get(url)
+    if r.status_code != 200:
+        raise RoutingError(f"OSRM error: HTTP {r.status_code} - {r.text}")
+
+    try:
+        data = r.json()
+    except ValueError as e:
+        raise RoutingError("OSRM error: response is not JSON") from e
+    if not isinstance(data, dict):
+        raise RoutingError("OSRM error: unexpected response body")
+    if data.get("code") != "Ok" or "durations" not in data:
+        raise RoutingError(f"OSRM error: {data.get('message', 'no table')}")
+    if "distances" not in data:
+        # annotations=distance was requested; a table without it is unusable
+        raise RoutingError("OSRM error: table has no distances")
+
+    return data["distances"], data["durations"]
+
+
+# The public OSRM server rejects /table requests with more than 100
+# coordinates (sources + destinations)
+OSRM_TABLE_MAX_COORDS = 100
+
+
+async def road_distances_m(
+    profile: OSRM_PROFILE,
+    origin: tuple[float, float],
+    points: list[tuple[float, float]],
+) -> list[float | None]:
+    """
+    Road distance in meters from origin to each of points, all (lat, lon),
+    via OSRM /table: one request per chunk of destinations, issued
+    concurrently. Unreachable points are None.
+    """
+    # one coordinate per request goes to the origin
+    step = OSRM_TABLE_MAX_COORDS - 1
+    chunks = [points[i : i + step] for i in range(0, len(points), step)]
+    tables = await asyncio.gather(
+        *(call_osrm_table(profile, [origin], chunk) for chunk in chunks)
+    )
+    out: list[float | None] = []
+    for chunk, (distances, _) in zip(chunks, tables):
+        if (
+            not isinstance(distances, list)
+            or len(distances) != 1
+            or not isinstance(distances[0], list)
+            or len(distances[0]) != len(chunk)
+        ):
+            raise RoutingError("OSRM error: table shape does not match request")
+        out.extend(distances[0])
+    return out
+
+
 async def get_travel_estimates(
     from_lat: float,
     from_lon: float,
@@ -52,18 +248,23 @@ async def get_travel_estimates(
     """
     Returns a dict with distance and durations for car/motorcycle/bicycle.
     """
-    # car: driving profile
-    dist_car, dur_car = await call_osrm_route(
-        "driving", from_lat, from_lon, to_lat, to_lon
+    # car and bike are independent OSRM calls, so issue them concurrently
+    car, bike = await asyncio.gather(
+        call_osrm_route("driving", from_lat, from_lon, to_lat, to_lon),
+        call_osrm_route("cycling", from_lat, from_lon, to_lat, to_lon),
+        return_exceptions=True,
     )
+    if isinstance(car, BaseException):
+        raise car
+    dist_car, dur_car = car
 
-    # try real cycling, otherwise approximate
-    try:
-        dist_bike, dur_bike = await call_osrm_route(
-            "cycling", from_lat, from_lon, to_lat, to_lon
-        )
-    except RoutingError:
+    # real cycling if available, otherwise approximate
+    if isinstance(bike, RoutingError):
         dist_bike, dur_bike = dist_car, dur_car * 2.5  # slower than car
+    elif isinstance(bike, BaseException):
+        raise bike
+    else:
+        dist_bike, dur_bike = bike
 
     # motorcycle as “faster car”
     dist_motorcycle = dist_car
@@ -77,4 +278,4 @@ async def get_travel_estimates(
             "bicycle": dur_bike,
         },
         "provider": "osrm",
-    }
\ No newline at end of file
+    }
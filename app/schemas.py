@@ -3,7 +3,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List, Dict, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from .routing import OSRM_TABLE_MAX_COORDS
 
 
 # ----------------------
@@ -127,3 +129,34 @@ class RoutingEstimateResponse(BaseModel):
     distanceMeters: float
     durationsSeconds: TravelDurations
     provider: str
+
+
+class LatLon(BaseModel):
+    lat: float
+    lon: float
+
+
+class RoutingBatchRequest(BaseModel):
+    origins: List[LatLon] = Field(..., min_length=1)
+    destinations: List[LatLon] = Field(..., min_length=1)
+
+    @model_validator(mode="after")
+    def _check_size(self):
+        if len(self.origins) + len(self.destinations) > OSRM_TABLE_MAX_COORDS:
+            raise ValueError(
+                f"at most {OSRM_TABLE_MAX_COORDS} origins + destinations per batch"
+            )
+        return self
+
+
+class TravelDurationMatrices(BaseModel):
+    car: List[List[float | None]]
+    motorcycle: List[List[float | None]]
+    bicycle: List[List[float | None]]
+
+
+class RoutingBatchResponse(BaseModel):
+    # matrices are indexed [origin][destination]; null = no route
+    distancesMeters: List[List[float | None]]
+    durationsSeconds: TravelDurationMatrices
+    provider: str
@@ -1,40 +1,170 @@
 from __future__ import annotations
 
 import math
-from datetime import datetime
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from functools import cache
+from math import asin, cos, degrees, radians, sin, sqrt
 from typing import Iterable
 
 from .config import settings
 
 
+EARTH_RADIUS_M = 6371000.0
+# Below this radius the equirectangular projection is within ~0.1% of
+# haversine, so the neighbour gate can skip the great-circle trig.
+EQUIRECT_MAX_RADIUS_M = 5000.0
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180.0
+
+
+def epoch_s(dt: datetime) -> float:
+    """
+    Seconds since the Unix epoch for a naive UTC datetime (as stored in the DB).
+    """
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
 def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Haversine distance in meters.
     """
-    R = 6371000.0
-    from math import radians, sin, cos, atan2
-
     phi1 = radians(lat1)
     phi2 = radians(lat2)
-    dphi = radians(lat2 - lat1)
+    dphi = phi2 - phi1
     dlambda = radians(lon2 - lon1)
 
     a = sin(dphi / 2.0) ** 2 + cos(phi1) * cos(phi2) * sin(dlambda / 2.0) ** 2
-    c = 2 * atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+    # 2*asin(sqrt(a)) == 2*atan2(sqrt(a), sqrt(1-a)); clamp float overshoot
+    return 2.0 * EARTH_RADIUS_M * asin(sqrt(min(a, 1.0)))
+
+
+def bounding_box(lat: float, radius_m: float) -> tuple[float, float]:
+    """
+    (dlat, dlon) half-extents in degrees of a lat/lon box around a point at
+    latitude lat that contains every point within radius_m of it. dlon is
+    180 when the circle covers a pole.
+    """
+    ang = min(radius_m / EARTH_RADIUS_M, math.pi)
+    cos_phi = cos(radians(lat))
+    # latitude extent is exact along the meridian; the widest longitude
+    # extent of a spherical cap is asin(sin(r/R) / cos(lat))
+    dlat = degrees(ang)
+    if sin(ang) < cos_phi:
+        dlon = degrees(asin(sin(ang) / cos_phi))
+    else:
+        dlon = 180.0
+    return dlat, dlon
+
+
+def neighbors_within(
+    lat: float, lon: float, stops: Iterable, radius_m: float
+) -> tuple[list, list[float]]:
+    """
+    Return (stops, distances_m) for the stops (objects with .lat, .lon)
+    within radius_m of (lat, lon).
+
+    Same great-circle test as haversine_m(...) <= radius_m, but the query
+    point's trig is computed once and each stop is compared on the haversine
+    term itself; the distance is only finished off for stops that pass. A
+    lat/lon bounding box around the query point rejects far-away stops
+    before any trig. For radii under EQUIRECT_MAX_RADIUS_M the test is done
+    on squared equirectangular meters instead, with no trig per stop.
+    """
+    phi1 = radians(lat)
+    lam1 = radians(lon)
+    cos_phi1 = cos(phi1)
+    ang = min(radius_m / EARTH_RADIUS_M, math.pi)
+    # d <= r  <=>  sin^2(d / 2R) <= sin^2(r / 2R), for r up to half the globe
+    a_max = sin(ang / 2.0) ** 2
+
+    dlat_max, dlon_max = bounding_box(lat, radius_m)
+
+    out = []
+    dists = []
+    if radius_m < EQUIRECT_MAX_RADIUS_M:
+        m_per_deg = METERS_PER_DEGREE
+        m_per_deg_lon = m_per_deg * cos_phi1
+        r2 = float(radius_m) ** 2
+        for n in stops:
+            dlat = n.lat - lat
+            if abs(dlat) > dlat_max:
+                continue
+            dlon = abs(n.lon - lon)
+            if dlon > 180.0:  # across the antimeridian
+                dlon = 360.0 - dlon
+            if dlon > dlon_max:
+                continue
+            dy = dlat * m_per_deg
+            dx = dlon * m_per_deg_lon
+            d2 = dx * dx + dy * dy
+            if d2 <= r2:
+                out.append(n)
+                dists.append(sqrt(d2))
+        return out, dists
+
+    for n in stops:
+        if abs(n.lat - lat) > dlat_max:
+            continue
+        dlon = abs(n.lon - lon)
+        if dlon > 180.0:  # across the antimeridian
+            dlon = 360.0 - dlon
+        if dlon > dlon_max:
+            continue
+
+        phi2 = radians(n.lat)
+        a = (
+            sin((phi2 - phi1) / 2.0) ** 2
+            + cos_phi1 * cos(phi2) * sin((radians(n.lon) - lam1) / 2.0) ** 2
+        )
+        if a <= a_max:
+            out.append(n)
+            dists.append(2.0 * EARTH_RADIUS_M * asin(sqrt(min(a, 1.0))))
+    return out, dists
+
+
+class NeighborIndex:
+    """
+    Stops near one query point, kept as time-sorted columns: the stop records
+    plus parallel lists of their distance to the query point and their
+    scheduled_at as epoch seconds, so a slot's time window is two bisections,
+    and no slot recomputes a stop's distance or touches a datetime.
+    stops/dists are typically neighbors_within(...)'s result (dists possibly
+    swapped for road distances); stops must be ordered by scheduled_at.
+    """
+
+    __slots__ = ("stops", "dists", "times")
+
+    def __init__(self, stops: list, dists: list[float]):
+        self.stops = stops
+        self.dists = dists
+        self.times = [epoch_s(n.scheduled_at) for n in stops]
+
+    def bounds(self, start_s: float, end_s: float) -> tuple[int, int]:
+        """
+        Index range [lo, hi) of the stops scheduled in [start_s, end_s].
+        """
+        return bisect_left(self.times, start_s), bisect_right(self.times, end_s)
 
 
 def _decay_params_for_mode() -> tuple[float, float]:
+    """
+    Effective (d0 meters, t0 minutes) decay for the current runtime settings.
+    """
+    mode = getattr(settings, "DELIVERY_TYPE", "motorcycle")
+    return _decay_params(mode, settings.T0_MIN)
+
+
+@cache
+def _decay_params(mode: str, base_t0: float) -> tuple[float, float]:
     """
     Choose effective distance/time decay based on delivery type.
+    Keyed on its inputs, so a settings change is picked up without invalidation.
 
     - car: more tolerant to distance
     - motorcycle: baseline
     - bicycle: more sensitive to distance and time
     """
     base_d0 = 800.0  # meters
-    base_t0 = settings.T0_MIN
-    mode = getattr(settings, "DELIVERY_TYPE", "motorcycle")
 
     if mode == "car":
         d0 = base_d0 * 1.4
@@ -53,20 +183,69 @@ def score_slot(
     user_lon: float,
     slot,
     neighbors: Iterable,
+    distances: Iterable[float] | None = None,
 ) -> float:
     """
     Score how batchable this slot is for a given user + set of neighbors.
     neighbors: iterable of ScheduledStop-like objects with .lat, .lon, .scheduled_at
+    distances: optional user->neighbor distances in meters, aligned with
+    neighbors (e.g. from neighbors_within); if omitted they are approximated
+    with the equirectangular projection around the user, which is plenty
+    for a decay on the scale of d0 over same-city distances.
     """
     d0, t0 = _decay_params_for_mode()
+    exp = math.exp
+    slot_s = epoch_s(slot.start_at)
+    if distances is None:
+        m_per_deg_lon = METERS_PER_DEGREE * cos(radians(user_lat))
+        pairs = (
+            (
+                n,
+                math.hypot(
+                    # wrap dlon into [-180, 180) across the antimeridian
+                    ((n.lon - user_lon + 180.0) % 360.0 - 180.0) * m_per_deg_lon,
+                    (n.lat - user_lat) * METERS_PER_DEGREE,
+                ),
+            )
+            for n in neighbors
+        )
+    else:
+        pairs = zip(neighbors, distances)
+
     score = 0.0
-    for n in neighbors:
-        dist = haversine_m(user_lat, user_lon, n.lat, n.lon)
-        dt_min = abs((slot.start_at - n.scheduled_at).total_seconds()) / 60.0
-        score += math.exp(-dist / d0) * math.exp(-dt_min / t0)
+    for n, dist in pairs:
+        dt_min = abs(slot_s - epoch_s(n.scheduled_at)) / 60.0
+        score += exp(-dist / d0) * exp(-dt_min / t0)
     return score
 
 
+def score_slots(slots: Iterable, nearby: NeighborIndex, window_s: float) -> list:
+    """
+    Score many slots against one NeighborIndex in a single pass.
+
+    Same result as score_slot(...) on each slot's window of neighbors
+    (stops scheduled within window_s seconds of the slot), but the decay
+    parameters are read once and each stop's distance term exp(-d / d0) is
+    computed once rather than once per slot it falls into.
+    Returns [(score, neighbor_count), ...] aligned with slots.
+    """
+    d0, t0 = _decay_params_for_mode()
+    exp = math.exp
+    times = nearby.times
+    weights = [exp(-d / d0) for d in nearby.dists]
+
+    out = []
+    for slot in slots:
+        slot_s = epoch_s(slot.start_at)
+        lo, hi = nearby.bounds(slot_s - window_s, epoch_s(slot.end_at) + window_s)
+        score = 0.0
+        for i in range(lo, hi):
+            dt_min = abs(slot_s - times[i]) / 60.0
+            score += weights[i] * exp(-dt_min / t0)
+        out.append((score, hi - lo))
+    return out
+
+
 def discount_from_score(score: float) -> float:
     """
     Convert dimensionless score → discount fraction [0, max_discount].
@@ -81,10 +260,13 @@ def discount_from_score(score: float) -> float:
 def clamp_fee(base_fee_cents: int, discount_pct: float) -> tuple[int, int, int]:
     """
     Apply discount and clamp to min delivery fee.
+    The discount is applied in whole basis points with integer cent math,
+    i.e. exactly the discountPct shown to 4 decimals, rounded half up.
     Returns: final_fee_cents, discount_cents, base_fee_cents
     """
     base_fee = base_fee_cents
-    raw_discount = int(round(base_fee * discount_pct))
+    bps = round(discount_pct * 10000)
+    raw_discount = (base_fee * bps + 5000) // 10000
     discounted = base_fee - raw_discount
     final_fee = max(discounted, settings.MIN_DELIVERY_FEE_CENTS)
     applied_discount = base_fee - final_fee
@@ -1,6 +1,6 @@
-import uuid
+import secrets
 
 __all__ = ["gen_id"]
 
 def gen_id(prefix: str) -> str:
-    return f"{prefix}_{uuid.uuid4().hex[:10]}"
+    return f"{prefix}_{secrets.token_hex(5)}"